@@ -2,13 +2,18 @@
 """
 MicroPython compatible module for making a strip of NeoPixels behave like an Alexa
 """
-import math
 import time
 # Handle either desktop or micropython
 try:
     import urandom
 except ImportError:
     import random as urandom
+try:
+    import micropython
+except ImportError:
+    # On desktop the code emitter decorators just leave functions as they are
+    class micropython:
+        native = staticmethod(lambda f: f)
 
 # Globals - Most behaviors can be configured by changing these variables 
 BLUE = (0, 5, 40)
@@ -33,34 +38,292 @@ SLEEP_TIME = 1/FPS
 NEOPIXEL_PIN = None
 BUTTON_PIN = None
 
+# Extra diagnostic output - keep off on a board as printing over UART stalls
+# the animation far longer than writing to the strip does
+DEBUG = False
+# Resolved once here so the animation loops don't pay for a branch on every call
+_dbg = print if DEBUG else (lambda *args: None)
+
 def pprint(np):
     """
     Utility function approximating pprint.pprint for lists
     :param list np: A list of items to print out
     :returns: None
     """
-    np = list(np)
-    print('[' + str(np[0]) + ',')
-    for i in range(len(np)):
-        # Don't do anything for first and last items
-        if i == 0 or i == (len(np)-1):
-            continue
-        print(' ' + str(np[i]) + ',')
-    print(' ' + str(np[-1]) + ']')
+    # Build the whole thing up front so it goes out in a single print call
+    print('[' + ',\n '.join(str(item) for item in np) + ']')
+
+
+@micropython.native
+def _pack_colors(colors, out=None):
+    """
+    Utility function to pack a list of RGB tuples into a flat bytearray
+    Bytes are written in GRB order as that is what the WS2812 expects on the wire
+    :param list colors: Input list of tuples of ints from 0-255
+    :param bytearray out: Optional preallocated buffer to write into
+    :returns: bytearray
+    """
+    if out is None:
+        out = bytearray(len(colors)*3)
+    for i in range(len(colors)):
+        color = colors[i]
+        out[3*i] = color[1]
+        out[3*i+1] = color[0]
+        out[3*i+2] = color[2]
+    return out
+
+
+@micropython.native
+def _write_pixel(buf, index, color):
+    """
+    Utility function to write a single RGB tuple into a packed GRB buffer
+    :param bytearray buf: The packed buffer to write into
+    :param int index: Index of the pixel, negative indices count from the end
+    :param tuple color: A tuple of ints from 0-255
+    :returns: None
+    """
+    j = 3*index
+    buf[j] = color[1]
+    buf[j+1] = color[0]
+    buf[j+2] = color[2]
+
+
+def _unpack_colors(buf):
+    """
+    Utility function to turn a packed GRB buffer back into a list of RGB tuples
+    :param bytearray buf: The packed buffer to read from
+    :returns: list
+    """
+    return [(buf[j+1], buf[j], buf[j+2]) for j in range(0, len(buf), 3)]
+
+
+def neopixel_to_buf(np):
+    """
+    Utility function to get a packed GRB copy of a neopixel object's contents
+    :param neopixel.NeoPixel np: The neopixel object to read from
+    :returns: bytearray
+    """
+    if hasattr(np, 'buf'):
+        return bytearray(np.buf)
+    return _pack_colors(list(np))
 
 
-def set_neopixel_to_list(np, input_list):
+def set_neopixel_to_buf(np, buf):
+    """
+    Utility function to set a neopixel object to a packed GRB buffer's contents
+    :param neopixel.NeoPixel np: The neopixel object to assign the buffer to
+    :param bytearray buf: Packed buffer with 3 bytes per pixel
+    :returns: neopixel.NeoPixel
     """
-    Utility function to loop over a list and set a neopixel object to it's contents
+    # A real neopixel.NeoPixel exposes its raw buffer so copy it in all at once
+    # instead of going through __setitem__ for every pixel
+    if hasattr(np, 'buf'):
+        np.buf[:] = buf
+    else:
+        np[:] = _unpack_colors(buf)
+    return np
+
+
+def set_neopixel_to_list(np, input_list, buf=None):
+    """
+    Utility function to set a neopixel object to a list's contents in one bulk write
     :param neopixel.NeoPixel np: The neopixel object to assign the list to
     :param list input_list: Input list of typles to assign to the neopixels
+    :param bytearray buf: Optional preallocated buffer used to pack the list
     :returns: neopixel.NeoPixel 
     """
-    for i in range(len(input_list)):
-        np[i] = input_list[i]
+    if hasattr(np, 'buf'):
+        return set_neopixel_to_buf(np, _pack_colors(input_list, buf))
+    np[:] = input_list
     return np
 
 
+def _pack(color):
+    """
+    Utility function to pack an RGB tuple into a single int
+    Channels are laid out 0x00GGRRBB, the same order as a packed GRB buffer
+    :param tuple color: A tuple of ints from 0-255
+    :returns: int
+    """
+    return (color[1] << 16) | (color[0] << 8) | color[2]
+
+
+@micropython.native
+def _fade_kernel(out, src_outer, src_mid, dst, weight):
+    """
+    Utility function computing one frame of a fade over a whole strip
+    Each pixel is mixed as (src*(64-weight) + dst*weight) >> 6, with the two
+    outer channels of a packed pixel handled together in one multiply and the
+    middle one in another. Weights are kept to 6 bits so every intermediate
+    value still fits in a MicroPython small int and never allocates.
+    Kept free of any object state so it can be compiled on its own
+    :param bytearray out: Packed GRB buffer to write the frame into
+    :param list src_outer: Starting pixels packed with _pack masked to 0xFF00FF
+    :param list src_mid: Starting pixels packed with _pack masked to 0x00FF00
+    :param int dst: Target color packed with _pack
+    :param int weight: How far through the fade this frame is, from 0 to 64
+    :returns: None
+    """
+    inv_weight = 64 - weight
+    dst_outer = (dst & 0xFF00FF) * weight
+    dst_mid = (dst & 0x00FF00) * weight
+    j = 0
+    for i in range(len(src_outer)):
+        outer = ((src_outer[i]*inv_weight + dst_outer) >> 6) & 0xFF00FF
+        mid = ((src_mid[i]*inv_weight + dst_mid) >> 6) & 0x00FF00
+        out[j] = outer >> 16
+        out[j+1] = mid >> 8
+        out[j+2] = outer & 0xFF
+        j += 3
+
+
+def _fade_lut(start_color, end_color, frames):
+    """
+    Utility function precomputing every frame of a whole strip fading between
+    two colors. Uses the same mix as _fade_kernel so the frames are identical
+    :param tuple start_color: Color the whole strip starts at
+    :param tuple end_color: Color the whole strip ends at
+    :param int frames: Number of frames to complete transition
+    :returns: list of bytes
+    """
+    start = _pack_colors([start_color])
+    end = _pack_colors([end_color])
+    lut = []
+    for frame in range(frames):
+        weight = (64*(frame+1))//frames
+        pixel = bytes((start[c]*(64-weight) + end[c]*weight) >> 6 for c in range(3))
+        lut.append(pixel * NUM_LIGHTS)
+    return lut
+
+
+def _rebuild_fills():
+    """
+    Utility function to precompute packed GRB bytes for the colors and for
+    filling the whole strip or the pointer with them.
+    Has to be called again whenever NUM_LIGHTS or the pointer width change
+    :returns: None
+    """
+    global BLUE_B, CYAN_B, BLACK_B, BLUE_FILL, BLACK_FILL, CYAN_FILL, FADE_LUTS
+    BLUE_B = bytes(_pack_colors([BLUE]))
+    CYAN_B = bytes(_pack_colors([CYAN]))
+    BLACK_B = bytes(_pack_colors([BLACK]))
+    BLUE_FILL = BLUE_B * NUM_LIGHTS
+    BLACK_FILL = BLACK_B * NUM_LIGHTS
+    CYAN_FILL = CYAN_B * (2*ALEXA_HALF_POINTER_WIDTH)
+    # Fades alexa pulses back and forth between, keyed on
+    # (packed start color, packed end color, frames)
+    FADE_LUTS = {
+        (BLUE_B, CYAN_B, 10): _fade_lut(BLUE, CYAN, 10),
+        (CYAN_B, BLUE_B, 10): _fade_lut(CYAN, BLUE, 10),
+    }
+
+
+_rebuild_fills()
+
+
+def _make_turn_on(num_lights, hpw, cyan, blue):
+    """
+    Utility function building the turn on animation for one particular strip
+    Everything the animation needs is fixed here so the returned generator only
+    ever works with values it closed over instead of looking up globals
+    :param int num_lights: Number of lights in the strip
+    :param int hpw: Half of the width of Alexa's pointer
+    :param tuple cyan: Color of the pointer
+    :param tuple blue: Color left behind the pointer
+    :returns: function
+    """
+    half = num_lights // 2
+    cyan_g, cyan_r, cyan_b = cyan[1], cyan[0], cyan[2]
+    write_pixel = _write_pixel
+
+    def turn_on_frames(np):
+        """
+        Generator updating np one frame at a time, yielding after each frame
+        :param neopixel.NeoPixel np: The neopixel object to animate
+        """
+        # Local GRB shadow of the strip so we never have to read pixels back out
+        # of the neopixel object, plus a count of how many are still BLACK
+        shadow = bytearray(num_lights*3)
+        black_left = num_lights - 2*hpw
+        # Set the two opposite ends of the strip to each have 
+        # half of Alexa's pointer's width CYAN
+        for i in range(hpw):
+            np[i] = cyan
+            np[-1+(i*-1)] = cyan
+            write_pixel(shadow, i, cyan)
+            write_pixel(shadow, -1+(i*-1), cyan)
+        # Do this until there are no more black pixels
+        while black_left:
+            # Iterating over half the number of pixels because we will work inward
+            # from both sides. Walk from the middle outwards so a pixel updated
+            # this frame can't be picked up again by the next index in the shadow
+            changed = False
+            for index in range(half-1, -1, -1):
+                # Front end we are pushing the pointer segment to the middle
+                j = 3*index
+                if (shadow[j] == 0 and shadow[j+1] == 0 and shadow[j+2] == 0 and
+                        shadow[j-3] == cyan_g and shadow[j-2] == cyan_r and shadow[j-1] == cyan_b):
+                    np[index] = cyan
+                    np[index - hpw] = blue
+                    write_pixel(shadow, index, cyan)
+                    write_pixel(shadow, index - hpw, blue)
+                    black_left -= 1
+                    changed = True
+                back_index = num_lights - index - 1
+                # If back end we are pulling the pointer segment to the middle
+                j = 3*back_index
+                if (shadow[j] == 0 and shadow[j+1] == 0 and shadow[j+2] == 0 and
+                        shadow[j+3] == cyan_g and shadow[j+4] == cyan_r and shadow[j+5] == cyan_b):
+                    np[back_index] = cyan
+                    np[back_index + hpw] = blue
+                    write_pixel(shadow, back_index, cyan)
+                    write_pixel(shadow, back_index + hpw, blue)
+                    black_left -= 1
+                    changed = True
+            # The whole strip has to be clocked out to update any of it, so the
+            # only saving available is never sending a frame where nothing moved.
+            # If nothing moved nothing ever will again so stop here too
+            if not changed:
+                return
+            yield
+
+    return turn_on_frames
+
+
+class NeoPixelStrip:
+    """
+    Minimal stand in for neopixel.NeoPixel on an ESP8266. The strip is held as a
+    packed GRB bytearray and the whole thing is sent out in one esp.neopixel_write
+    """
+    def __init__(self, pin, num_lights):
+        """
+        :param machine.Pin pin: Output pin the strip is connected to
+        :param int num_lights: Number of lights in the strip
+        """
+        import esp
+        self.pin = pin
+        self.buf = bytearray(num_lights*3)
+        self._neopixel_write = esp.neopixel_write
+
+    def __len__(self):
+        return len(self.buf) // 3
+
+    def __setitem__(self, index, color):
+        _write_pixel(self.buf, index, color)
+
+    def __getitem__(self, index):
+        j = 3*index
+        buf = self.buf
+        return (buf[j+1], buf[j], buf[j+2])
+
+    def write(self):
+        """
+        Sends the whole buffer out to the strip at 800kHz
+        :returns: None
+        """
+        self._neopixel_write(self.pin, self.buf, True)
+
+
 class AlexaNeoPixelController:
     """
     Class for making a strip of neopixels behave like Alexa.
@@ -72,66 +335,113 @@ class AlexaNeoPixelController:
         :param int button_pin: The pin number of a button for triggering behaviors
         """
         self.np_pin = np_pin
+        # While play is prerendering frames they are collected here instead of sent
+        self._frames = None
 
         # This can either be run on an ESP8266 actually connected to a Neopixel strip
         # or on a desktop computer where it will just print output for easier debugging
         if self.np_pin is not None:
             import machine
-            import neopixel
-            self.np = neopixel.NeoPixel(machine.Pin(np_pin), NUM_LIGHTS)
+            self.np = NeoPixelStrip(machine.Pin(np_pin, machine.Pin.OUT), NUM_LIGHTS)
         else:
             self.np = [()]*NUM_LIGHTS
+        # Preallocated buffer for packing full strip updates
+        self._buf = bytearray(NUM_LIGHTS*3)
+        # Turn on animation specialized for the strip as it is configured now
+        self._turn_on_impl = _make_turn_on(NUM_LIGHTS, ALEXA_HALF_POINTER_WIDTH, CYAN, BLUE)
+        # Index of the center of Alexa's pointer, tracked as it moves so it never
+        # has to be searched for in the strip
+        self._pointer_center = HALF_NUM_LIGHTS
         # If there is a button connected set it up to trigger self.play when pressed
         if button_pin is not None:
             import machine
             button = machine.Pin(button_pin, machine.Pin.IN)
             button.irq(trigger=machine.Pin.IRQ_FALLING, handler=self.play)
-        pprint(self.np)
+        if DEBUG:
+            pprint(self.np)
+        # Set strip to all off
+        self.np = set_neopixel_to_buf(self.np, BLACK_FILL)
+        self._show('In __init__:')
+
+    def reconfigure(self, num_lights, pointer_width):
+        """
+        Changes the length of the strip and the width of Alexa's pointer in place,
+        reusing this controller rather than having to build a new one
+        :param int num_lights: Number of lights in string - has to be even
+        :param int pointer_width: Width in LEDs of the pointer - has to be even
+        :returns: None
+        """
+        global NUM_LIGHTS, HALF_NUM_LIGHTS, ALEXA_POINTER_WIDTH, ALEXA_HALF_POINTER_WIDTH
+        NUM_LIGHTS = num_lights
+        HALF_NUM_LIGHTS = num_lights // 2
+        ALEXA_POINTER_WIDTH = pointer_width
+        ALEXA_HALF_POINTER_WIDTH = pointer_width // 2
+        _rebuild_fills()
+
+        if self.np_pin is not None:
+            self.np.buf = bytearray(num_lights*3)
+        else:
+            self.np = [BLACK]*num_lights
+        self._buf = bytearray(num_lights*3)
+        self._turn_on_impl = _make_turn_on(NUM_LIGHTS, ALEXA_HALF_POINTER_WIDTH, CYAN, BLUE)
+        self._pointer_center = HALF_NUM_LIGHTS
         # Set strip to all off
-        self.np = set_neopixel_to_list(self.np, [BLACK] * NUM_LIGHTS)
+        self.np = set_neopixel_to_buf(self.np, BLACK_FILL)
+        self._show('In reconfigure:')
+
+    def _send(self, label):
+        """
+        Sends the current state of the strip out - or prints it if there is no strip
+        :param str label: What is being shown, used when printing
+        :returns: None
+        """
         # Use self.np_pin to differentiate an actual neopixel.Neopixel from a list
         if self.np_pin:
             self.np.write()
         else:
-            print('In __init__:')
+            print(label)
             pprint(self.np)
-        time.sleep(SLEEP_TIME)
+
+    def _show(self, label, hold=1):
+        """
+        Shows the current state of the strip and holds it for a number of frames.
+        While play is prerendering the frame is recorded to be shown later instead
+        :param str label: What is being shown, used when printing
+        :param int hold: Number of frames to hold this state for
+        :returns: None
+        """
+        if self._frames is not None:
+            self._frames.append((label, neopixel_to_buf(self.np), hold))
+            return
+        self._send(label)
+        time.sleep(SLEEP_TIME*hold)
+
+    def _pause(self, hold):
+        """
+        Holds whatever was last shown for a number of extra frames
+        :param int hold: Number of frames to wait
+        :returns: None
+        """
+        if self._frames is not None:
+            if self._frames:
+                label, buf, held = self._frames[-1]
+                self._frames[-1] = (label, buf, held + hold)
+            return
+        time.sleep(SLEEP_TIME*hold)
 
     def turn_on(self):
         """
         Plays an animation approximating Alexa's turn on animation
         :returns: None
         """
-        # Set the two opposite ends of the strip to each have 
-        # half of Alexa's pointer's width CYAN
-        for i in range(ALEXA_HALF_POINTER_WIDTH):
-            self.np[i] = CYAN
-            self.np[-1+(i*-1)] = CYAN
-        # Do this until there are no more black pixels
-        np_cache = list(self.np)
-        while BLACK in np_cache:
-            # Iterating over half the number of pixels because we will work inward
-            # from both sides
-            for index in range(HALF_NUM_LIGHTS):
-                # Front end we are pushing the pointer segment to the middle
-                if np_cache[index] == BLACK and np_cache[index-1] == CYAN:
-                    self.np[index] = CYAN
-                    self.np[index - ALEXA_HALF_POINTER_WIDTH] = BLUE
-                back_index = NUM_LIGHTS - index - 1
-                # If back end we are pulling the pointer segment to the middle
-                if np_cache[back_index] == BLACK and np_cache[back_index+1] == CYAN:
-                    self.np[back_index] = CYAN
-                    self.np[back_index + ALEXA_HALF_POINTER_WIDTH] = BLUE
-            if self.np_pin:
-                self.np.write()
-            else:
-                print('Turning on:')
-                pprint(self.np)
-            np_cache = list(self.np)
-            time.sleep(SLEEP_TIME)
+        # Each time the animation yields it has finished updating one frame
+        for _ in self._turn_on_impl(self.np):
+            self._show('Turning on:')
+        # Both halves of the pointer have met in the middle
+        self._pointer_center = NUM_LIGHTS // 2
         # Pause extra long here not just one frame
-        time.sleep(SLEEP_TIME*32)
-        print('DONE')
+        self._pause(32)
+        _dbg('DONE')
 
     def look_around(self):
         """
@@ -139,34 +449,36 @@ class AlexaNeoPixelController:
         Approximating when Alexa is indicating the audio source moving.
         :returns: None
         """
+        # Work out everything that doesn't change between looks up front
+        getrandbits = urandom.getrandbits
+        num_lights = NUM_LIGHTS
+        half = NUM_LIGHTS // 2
+        hpw = ALEXA_HALF_POINTER_WIDTH
+        min_center = hpw
+        max_center = num_lights - hpw
         # getrandbits(1) returns a number that is either 0 or 1
-        num_times_to_look = urandom.getrandbits(1) + 1
+        num_times_to_look = getrandbits(1) + 1
         for i in range(num_times_to_look):
-            current_center = list(self.np).index(CYAN) + ALEXA_HALF_POINTER_WIDTH
-            offset = (urandom.getrandbits(1) + 1) * ALEXA_LOOK_OFFSET_BASE
+            current_center = self._pointer_center
+            offset = (getrandbits(1) + 1) * ALEXA_LOOK_OFFSET_BASE
             # Hover around true center
-            if current_center > HALF_NUM_LIGHTS:
+            if current_center > half:
                 offset *= -1
             new_center = current_center + offset
             # Don't want to deal with wrapping around properly or ensuring this
             # Doesn't produce a new_center that is too far to one side or the other
             # So lazily make sure that we don't go out of bounds
-            new_center = min(new_center, NUM_LIGHTS-ALEXA_HALF_POINTER_WIDTH)
-            new_center = max(new_center, ALEXA_HALF_POINTER_WIDTH)
-
-            # Determining the indices of the pixels that will now be cyan
-            new_cyan_pixels = range(new_center-2, new_center+2)
-
-            for i in range(NUM_LIGHTS):
-                self.np[i] = CYAN if i in new_cyan_pixels else BLUE
+            new_center = min(new_center, max_center)
+            new_center = max(new_center, min_center)
 
-            if self.np_pin:
-                self.np.write()
-            else:
-                print('Looking around:')
-                pprint(self.np)
-            # Pause extra long here not just one frame
-            time.sleep(SLEEP_TIME*32)
+            # Whole strip is BLUE apart from the pointer's pixels around the new center
+            buf = self._buf
+            buf[:] = BLUE_FILL
+            buf[3*(new_center-hpw):3*(new_center+hpw)] = CYAN_FILL
+            self.np = set_neopixel_to_buf(self.np, buf)
+            self._pointer_center = new_center
+            # Hold extra long here not just one frame
+            self._show('Looking around:', 32)
 
     def alternating_flash(self):
         """
@@ -186,12 +498,7 @@ class AlexaNeoPixelController:
                     self.np[i] = BLUE
                 else:
                     self.np[i] = CYAN
-            if self.np_pin:
-                self.np.write()
-            else:
-                print('Alternating Flash:')
-                pprint(self.np)
-            time.sleep(SLEEP_TIME*2)
+            self._show('Alternating Flash:', 2)
 
     def alternating_pulse_fade(self):
         """
@@ -203,7 +510,7 @@ class AlexaNeoPixelController:
             self.fade_to_color(CYAN)
             self.fade_to_color(BLUE)
 
-        time.sleep(SLEEP_TIME*32)
+        self._pause(32)
 
     def turn_off(self):
         """
@@ -217,13 +524,8 @@ class AlexaNeoPixelController:
                 self.np[i] = CYAN
             else:
                 self.np[i] = BLUE
-        if self.np_pin:
-            self.np.write()
-        else:
-            print('Turning off:')
-            pprint(self.np)
-        # Pause extra long here not just one frame
-        time.sleep(SLEEP_TIME*32)
+        # Hold extra long here not just one frame
+        self._show('Turning off:', 32)
 
         # Do this until there are nothing but black pixels
         np_cache = list(self.np)
@@ -241,16 +543,10 @@ class AlexaNeoPixelController:
                     self.np[back_index] = CYAN
                     self.np[back_index - ALEXA_HALF_POINTER_WIDTH] = BLACK
             if BLUE not in np_cache:
-                for i in range(NUM_LIGHTS):
-                    self.np[i] = BLACK
-            if self.np_pin:
-                self.np.write()
-            else:
-                print('Turning off:')
-                pprint(self.np)
+                self.np = set_neopixel_to_buf(self.np, BLACK_FILL)
+            self._show('Turning off:')
             np_cache = list(self.np)
-            time.sleep(SLEEP_TIME)
-        print('DONE')
+        _dbg('DONE')
 
     def fade_to_color(self, color, frames=10):
         """
@@ -260,45 +556,52 @@ class AlexaNeoPixelController:
         :param int frames: Number of frames to complete transition
         :returns: None
         """
-        np_cache = list(self.np)
+        start = neopixel_to_buf(self.np)
+        # If the whole strip is one color and the fade is one of the common ones
+        # every frame has already been worked out
+        lut = FADE_LUTS.get((bytes(start[:3]), bytes(_pack_colors([color])), frames))
+        if lut is not None and start != start[:3] * NUM_LIGHTS:
+            lut = None
+        if lut is None:
+            # Work on the whole strip at once with each pixel packed into a single
+            # int rather than pixel by pixel through tuples
+            src = [(start[j] << 16) | (start[j+1] << 8) | start[j+2] for j in range(0, len(start), 3)]
+            src_outer = [word & 0xFF00FF for word in src]
+            src_mid = [word & 0x00FF00 for word in src]
+            dst = _pack(color)
+            target = _pack_colors([color]) * NUM_LIGHTS
+            frame_buf = self._buf
         # Take indicated number of frames
         for frame in range(frames):
+            if lut is not None:
+                self.np = set_neopixel_to_buf(self.np, lut[frame])
             # Account for any rounding issues by just explicitly setting color at end
-            if frame == frames-1:
-                self.np = set_neopixel_to_list(self.np, [color] * NUM_LIGHTS)
-            else:
-                for pixel in range(len(np_cache)):
-                    starting_color = np_cache[pixel]
-                    # Determining new color by taking starting color and
-                    # getting difference between that and target color then
-                    # dividing that by the total number of frames and
-                    # multiplying by the current frame
-                    # Finally add that calculated offset to the starting color
-                    red_offset = math.trunc((color[0] - starting_color[0])/frames)*(frame+1)
-                    green_offset = math.trunc((color[1] - starting_color[1])/frames)*(frame+1)
-                    blue_offset = math.trunc((color[2] - starting_color[2])/frames)*(frame+1)
-                    new_color = (starting_color[0] + red_offset,
-                                 starting_color[1] + green_offset,
-                                 starting_color[2] + blue_offset)
-
-                    self.np[pixel] = new_color
-            if self.np_pin:
-                self.np.write()
+            elif frame == frames-1:
+                self.np = set_neopixel_to_buf(self.np, target)
             else:
-                print('Fading:')
-                pprint(self.np)
-            time.sleep(SLEEP_TIME)
+                _fade_kernel(frame_buf, src_outer, src_mid, dst, (64*(frame+1))//frames)
+                self.np = set_neopixel_to_buf(self.np, frame_buf)
+            self._show('Fading:')
 
     def play(self):
         """
         Standard play routine - Alexa turning on receiving a command and turning off
         :returns: None
         """
+        # Work out every frame of the whole routine up front so that playing it
+        # back is nothing but copying each frame in and sending it out
+        self._frames = []
         self.turn_on()
         self.look_around()
         self.alternating_flash()
         self.alternating_pulse_fade()
         self.turn_off()
+        frames = self._frames
+        self._frames = None
+        for label, buf, hold in frames:
+            self.np = set_neopixel_to_buf(self.np, buf)
+            self._send(label)
+            time.sleep(SLEEP_TIME*hold)
 
 
 def unit_test():
@@ -307,26 +610,24 @@ def unit_test():
     Mostly checking exceptions due to math issues
     :returns: None
     """
-    global NUM_LIGHTS
-    global ALEXA_POINTER_WIDTH
     global SLEEP_TIME
 
-    NUM_LIGHTS = 4
-    ALEXA_POINTER_WIDTH = 2
-    ALEXA_HALF_POINTER_WIDTH = int(ALEXA_POINTER_WIDTH/2)
     SLEEP_TIME = 0
+    num_lights = 4
+    pointer_width = 2
 
+    # Reuse one controller throughout rather than building and throwing away
+    # a new one (and its buffers) for every combination
+    npc = AlexaNeoPixelController()
     for i in range(0, 512):
-        print('NUM_LIGHTS ', str(NUM_LIGHTS))
-        print('POINTER_WIDTH ', str(ALEXA_POINTER_WIDTH))
-        npc = AlexaNeoPixelController()
+        print('NUM_LIGHTS ', str(num_lights))
+        print('POINTER_WIDTH ', str(pointer_width))
+        npc.reconfigure(num_lights, pointer_width)
         npc.play()
         time.sleep(1)
-        del(npc)
-        NUM_LIGHTS += 2
+        num_lights += 2
         if i%4:
-            ALEXA_POINTER_WIDTH += 2
-            ALEXA_HALF_POINTER_WIDTH += 1
+            pointer_width += 2
 
 npc = AlexaNeoPixelController()
 #npc = AlexaNeoPixelController(np_pin=4)